@@ -4,15 +4,116 @@ Connects to MCP server and uses Claude to analyze surf conditions
 """
 
 import asyncio
-import json
+import functools
+import math
 import os
-from typing import Optional
-import ollama
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+from anthropic import AsyncAnthropic
 import gradio as gr
-import httpx
+import numpy as np
+
+from open_meteo import MARINE_CURRENT, OPENMETEO, WIND_CURRENT, WIND_HOURLY, current_values
+
+# Initialize Anthropic client (async so reports can stream on Gradio's event loop)
+client = AsyncAnthropic()
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+
+# Static forecaster instructions, sent as a cached system prompt so repeat reports
+# only pay for the small per-spot data message
+PROMPT_HEADER = """You are an expert surf forecaster. You will be given current conditions and 24-hour forecast data for a surf spot.
+
+Please provide:
+1. **Overall Rating** (1-10 scale) with emoji
+2. **Current Conditions Summary** - describe what surfers can expect right now
+3. **Best Time to Surf** - when in the next 24 hours will conditions be optimal
+4. **Detailed Analysis** - discuss swell quality, wind conditions, and wave period
+5. **Recommendations** - skill level suited for these conditions and any safety concerns
+
+Format your response as a clear, engaging surf report that both beginners and experienced surfers can understand."""
+
+# Per-spot data sent as the user message; only this part is formatted per report
+PROMPT_TAIL_FMT = """Analyze conditions for {spot_name}.
+
+Current Conditions:
+- Wave Height: {wave}m
+- Wave Period: {period}s
+- Wind Speed: {wind} km/h
+- Wind Direction: {wind_dir}°
+
+24-Hour Forecast Data:
+Wave Heights (m): {wh24}
+Swell Heights (m): {sh24}
+Wave Periods (s): {wp24}
+Wind Speeds (km/h): {ws24}
+Wind Directions (°): {wd24}"""
+
+# Running token usage, including prompt cache reads/writes reported by the API
+llm_usage = {
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cache_creation_input_tokens": 0,
+    "cache_read_input_tokens": 0,
+}
+
+# Completed reports keyed on the per-spot prompt, so identical data snapshots skip the LLM
+REPORT_CACHE_SIZE = 128
+report_cache: OrderedDict[str, str] = OrderedDict()
+report_cache_stats = {"hits": 0, "misses": 0}
+
+# Hourly marine series the report prompt uses
+MARINE_HOURLY = ("wave_height", "wave_period", "swell_wave_height")
+
+
+def async_ttl_cache(ttl: float, maxsize: int = 128):
+    """Cache an async function's results for ttl seconds, keyed on its arguments.
+
+    Holds at most maxsize entries, evicting the oldest first. Exposes cache_info()
+    with hit/miss counts so the TTL can be tuned.
+    """
+    def decorator(func):
+        # Entries all share one TTL, so insertion order is also expiry order
+        cache: OrderedDict = OrderedDict()
+        locks = {}
+        stats = {"hits": 0, "misses": 0}
+
+        def store(key, value):
+            now = time.monotonic()
+            while cache and next(iter(cache.values()))[1] <= now:
+                cache.popitem(last=False)
+            cache.pop(key, None)
+            cache[key] = (value, now + ttl)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            # Drop locks for keys that are no longer cached and not being fetched
+            for lock_key in [k for k, lock in locks.items() if k not in cache and not lock.locked()]:
+                del locks[lock_key]
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            # One lock per key so concurrent clicks on the same spot share a single fetch
+            lock = locks.setdefault(args, asyncio.Lock())
+            async with lock:
+                entry = cache.get(args)
+                if entry is not None and entry[1] > time.monotonic():
+                    stats["hits"] += 1
+                    return entry[0]
+                stats["misses"] += 1
+                value = await func(*args)
+                store(args, value)
+                return value
+
+        def cache_clear():
+            cache.clear()
+            locks.clear()
+            stats.update(hits=0, misses=0)
+
+        wrapper.cache_info = lambda: {**stats, "size": len(cache)}
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
 
-# Initialize Anthropic client
-client = ollama.Client()
 
 # Known surf spots with coordinates (expand as needed)
 SURF_SPOTS = {
@@ -25,42 +126,87 @@ SURF_SPOTS = {
     "Uluwatu, Bali": {"lat": -8.8293, "lon": 115.0846},
 }
 
+# Lookups derived once at import instead of on every click
+SPOT_NAMES = tuple(SURF_SPOTS)
+SPOT_COORDS = {name: (d["lat"], d["lon"]) for name, d in SURF_SPOTS.items()}
+
 
 async def get_marine_weather(lat: float, lon: float) -> dict:
-    """Fetch marine weather data from Open-Meteo API."""
-    async with httpx.AsyncClient(timeout=30.0) as http_client:
-        # Marine forecast
-        marine_url = "https://marine-api.open-meteo.com/v1/marine"
-        marine_params = {
-            "latitude": lat,
-            "longitude": lon,
-            "hourly": "wave_height,wave_direction,wave_period,swell_wave_height,swell_wave_direction,swell_wave_period",
-            "current": "wave_height,wave_direction,wave_period",
-            "timezone": "auto"
-        }
-        marine_response = await http_client.get(marine_url, params=marine_params)
-        marine_data = marine_response.json()
-        
-        # Wind forecast
-        wind_url = "https://api.open-meteo.com/v1/forecast"
-        wind_params = {
-            "latitude": lat,
-            "longitude": lon,
-            "hourly": "wind_speed_10m,wind_direction_10m",
-            "current": "wind_speed_10m,wind_direction_10m",
-            "timezone": "auto"
-        }
-        wind_response = await http_client.get(wind_url, params=wind_params)
-        wind_data = wind_response.json()
-        
-        return {
-            "marine": marine_data,
-            "wind": wind_data
+    """Fetch marine weather data, reusing recent results for nearby coordinates."""
+    # Open-Meteo grids are far coarser than 3 decimal places (~100m)
+    return await _fetch_marine_weather(round(lat, 3), round(lon, 3))
+
+
+@async_ttl_cache(ttl=600)
+async def _fetch_marine_weather(lat: float, lon: float) -> dict:
+    """Fetch marine weather data from Open-Meteo API.
+
+    Wave and wind variables are served by separate hosts, so this stays two requests;
+    only the variables and the 24 hours read by the report are requested.
+    """
+    # Marine forecast
+    marine_url = "https://marine-api.open-meteo.com/v1/marine"
+    marine_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": MARINE_HOURLY,
+        "current": MARINE_CURRENT,
+        "forecast_days": 1,
+        "timezone": "auto"
+    }
+    
+    # Wind forecast
+    wind_url = "https://api.open-meteo.com/v1/forecast"
+    wind_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": WIND_HOURLY,
+        "current": WIND_CURRENT,
+        "forecast_days": 1,
+        "timezone": "auto"
+    }
+    
+    # Both requests are independent, so fire them concurrently (the client is synchronous)
+    marine_responses, wind_responses = await asyncio.gather(
+        asyncio.to_thread(OPENMETEO.weather_api, marine_url, params=marine_params),
+        asyncio.to_thread(OPENMETEO.weather_api, wind_url, params=wind_params)
+    )
+    
+    return {
+        "marine": unpack_response(marine_responses[0], MARINE_CURRENT, MARINE_HOURLY),
+        "wind": unpack_response(wind_responses[0], WIND_CURRENT, WIND_HOURLY)
+    }
+
+
+def unpack_response(response, current_vars: tuple, hourly_vars: tuple) -> dict:
+    """Map a FlatBuffers response onto the JSON-style {"current": ..., "hourly": ...} shape.
+
+    Hourly series stay NumPy arrays; they are only converted at the prompt boundary.
+    """
+    hourly = response.Hourly()
+    return {
+        "current": current_values(response, current_vars),
+        "hourly": {
+            name: hourly.Variables(i).ValuesAsNumpy() for i, name in enumerate(hourly_vars)
         }
+    }
+
+
+def quantize(value, ndigits: int = 1):
+    """Round a reading for the prompt; ndigits=0 gives an int. Missing values become N/A."""
+    if not isinstance(value, (int, float)) or math.isnan(value):
+        return "N/A"
+    # Adding 0.0 turns -0.0 (e.g. round(-0.04, 1)) into 0.0
+    return round(value, ndigits) + 0.0 if ndigits else round(value)
 
 
-def analyze_surf_conditions(spot_name: str, weather_data: dict) -> str:
-    """Use Claude to analyze surf conditions and generate a report."""
+def format_series(values: np.ndarray, ndigits: int = 1) -> str:
+    """Join quantized hourly values compactly; Python's list repr costs far more prompt tokens."""
+    return ",".join(str(quantize(x, ndigits)) for x in values.tolist())
+
+
+async def analyze_surf_conditions(spot_name: str, weather_data: dict) -> AsyncIterator[str]:
+    """Use Claude to analyze surf conditions, yielding the report text as it streams."""
     
     # Extract current conditions
     current_wave = weather_data["marine"].get("current", {}).get("wave_height", "N/A")
@@ -69,72 +215,90 @@ def analyze_surf_conditions(spot_name: str, weather_data: dict) -> str:
     current_wind_dir = weather_data["wind"].get("current", {}).get("wind_direction_10m", "N/A")
     
     # Get hourly forecast (next 24 hours)
-    hourly_marine = weather_data["marine"].get("hourly", {})
-    hourly_wind = weather_data["wind"].get("hourly", {})
+    hourly_marine = weather_data["marine"]["hourly"]
+    hourly_wind = weather_data["wind"]["hourly"]
+    wave_heights = hourly_marine["wave_height"][:24]
+    swell_heights = hourly_marine["swell_wave_height"][:24]
+    wave_periods = hourly_marine["wave_period"][:24]
+    wind_speeds = hourly_wind["wind_speed_10m"][:24]
+    wind_directions = hourly_wind["wind_direction_10m"][:24]
     
-    # Create prompt for Claude
-    prompt = f"""You are an expert surf forecaster analyzing conditions for {spot_name}.
-
-Current Conditions:
-- Wave Height: {current_wave}m
-- Wave Period: {current_period}s
-- Wind Speed: {current_wind} km/h
-- Wind Direction: {current_wind_dir}°
-
-24-Hour Forecast Data:
-Wave Heights (m): {hourly_marine.get('wave_height', [])[:24]}
-Swell Heights (m): {hourly_marine.get('swell_wave_height', [])[:24]}
-Wave Periods (s): {hourly_marine.get('wave_period', [])[:24]}
-Wind Speeds (km/h): {hourly_wind.get('wind_speed_10m', [])[:24]}
-Wind Directions (°): {hourly_wind.get('wind_direction_10m', [])[:24]}
-
-Please provide:
-1. **Overall Rating** (1-10 scale) with emoji
-2. **Current Conditions Summary** - describe what surfers can expect right now
-3. **Best Time to Surf** - when in the next 24 hours will conditions be optimal
-4. **Detailed Analysis** - discuss swell quality, wind conditions, and wave period
-5. **Recommendations** - skill level suited for these conditions and any safety concerns
+    # Per-spot data for Claude; the static instructions live in PROMPT_HEADER
+    prompt = PROMPT_TAIL_FMT.format(
+        spot_name=spot_name,
+        wave=quantize(current_wave),
+        period=quantize(current_period),
+        wind=quantize(current_wind),
+        wind_dir=quantize(current_wind_dir, 0),
+        wh24=format_series(wave_heights),
+        sh24=format_series(swell_heights),
+        wp24=format_series(wave_periods),
+        ws24=format_series(wind_speeds),
+        wd24=format_series(wind_directions, 0)
+    )
 
-Format your response as a clear, engaging surf report that both beginners and experienced surfers can understand."""
+    cached = report_cache.get(prompt)
+    if cached is not None:
+        report_cache_stats["hits"] += 1
+        report_cache.move_to_end(prompt)
+        yield cached
+        return
+    report_cache_stats["misses"] += 1
 
     # Call Claude API
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
+        report = ""
+        async with client.messages.stream(
+            model=CLAUDE_MODEL,
             max_tokens=2000,
+            system=[
+                {"type": "text", "text": PROMPT_HEADER, "cache_control": {"type": "ephemeral"}}
+            ],
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+        ) as stream:
+            async for text in stream.text_stream:
+                report += text
+                yield report
+            response = await stream.get_final_message()
+        
+        for key in llm_usage:
+            llm_usage[key] += getattr(response.usage, key, None) or 0
+        print(
+            f"Claude usage - input: {response.usage.input_tokens}, "
+            f"cache read: {response.usage.cache_read_input_tokens or 0}, "
+            f"cache write: {response.usage.cache_creation_input_tokens or 0}, "
+            f"output: {response.usage.output_tokens} (totals: {llm_usage})"
         )
         
-        return response.content[0].text
+        report_cache[prompt] = report
+        if len(report_cache) > REPORT_CACHE_SIZE:
+            report_cache.popitem(last=False)
     
     except Exception as e:
-        return f"Error generating surf report: {str(e)}"
+        yield f"Error generating surf report: {str(e)}"
 
 
-async def generate_surf_report(spot_name: str, custom_lat: Optional[float] = None, 
-                               custom_lon: Optional[float] = None) -> tuple[str, str]:
-    """Main function to generate surf report."""
+async def generate_surf_report(spot_name: str, custom_lat: Optional[str] = None, 
+                               custom_lon: Optional[str] = None) -> AsyncIterator[tuple[str, str]]:
+    """Main function to generate surf report, yielding partial reports as they stream."""
     
     try:
         # Determine coordinates
         if custom_lat and custom_lon:
-            lat, lon = custom_lat, custom_lon
-            location_info = f"Custom Location: {lat}°, {lon}°"
-        elif spot_name in SURF_SPOTS:
-            coords = SURF_SPOTS[spot_name]
-            lat, lon = coords["lat"], coords["lon"]
-            location_info = f"{spot_name}\nCoordinates: {lat}°, {lon}°"
+            lat, lon = float(custom_lat), float(custom_lon)
         else:
-            return "❌ Spot not found. Please select from the dropdown or enter custom coordinates.", ""
+            coords = SPOT_COORDS.get(spot_name)
+            if coords is None:
+                yield "❌ Spot not found. Please select from the dropdown or enter custom coordinates.", ""
+                return
+            lat, lon = coords
         
         # Fetch weather data
         weather_data = await get_marine_weather(lat, lon)
         
-        # Generate AI analysis
-        surf_report = analyze_surf_conditions(spot_name, weather_data)
-        
         # Create weather data summary
         current = weather_data["marine"].get("current", {})
         current_wind = weather_data["wind"].get("current", {})
@@ -148,17 +312,15 @@ async def generate_surf_report(spot_name: str, custom_lat: Optional[float] = Non
 🧭 Wind Direction: {current_wind.get('wind_direction_10m', 'N/A')}°
 """
         
-        return surf_report, weather_summary
+        # Show the weather data right away, then stream AI analysis
+        yield "", weather_summary
+        async for surf_report in analyze_surf_conditions(spot_name, weather_data):
+            yield surf_report, weather_summary
+        
+        print(f"Cache stats - weather: {_fetch_marine_weather.cache_info()}, reports: {report_cache_stats}")
         
     except Exception as e:
-        return f"❌ Error: {str(e)}", ""
-
-
-def sync_generate_report(spot: str, lat: Optional[str], lon: Optional[str]):
-    """Synchronous wrapper for async report generation."""
-    custom_lat = float(lat) if lat else None
-    custom_lon = float(lon) if lon else None
-    return asyncio.run(generate_surf_report(spot, custom_lat, custom_lon))
+        yield f"❌ Error: {str(e)}", ""
 
 
 # Create Gradio interface
@@ -173,7 +335,7 @@ with gr.Blocks(title="🏄 AI Surf Reporter", theme=gr.themes.Soft()) as demo:
     with gr.Row():
         with gr.Column(scale=2):
             spot_dropdown = gr.Dropdown(
-                choices=list(SURF_SPOTS.keys()),
+                choices=SPOT_NAMES,
                 label="Select Surf Spot",
                 value="Bells Beach, Australia",
                 info="Choose from popular surf spots"
@@ -209,7 +371,7 @@ with gr.Blocks(title="🏄 AI Surf Reporter", theme=gr.themes.Soft()) as demo:
             weather_data = gr.Markdown(label="📊 Weather Data")
     
     generate_btn.click(
-        fn=sync_generate_report,
+        fn=generate_surf_report,
         inputs=[spot_dropdown, custom_lat, custom_lon],
         outputs=[surf_report, weather_data]
     )
@@ -222,4 +384,5 @@ with gr.Blocks(title="🏄 AI Surf Reporter", theme=gr.themes.Soft()) as demo:
 
 
 if __name__ == "__main__":
-    demo.launch(share=True)
\ No newline at end of file
+    # The handler is async and I/O-bound, so many reports can be in flight at once
+    demo.queue(default_concurrency_limit=16).launch(share=True)
\ No newline at end of file
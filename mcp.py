@@ -4,21 +4,33 @@ Provides tools for checking surf conditions via weather API and web search
 """
 
 import asyncio
-import json
 import os
-from datetime import datetime
-from typing import Any
+from datetime import datetime, timezone
+from typing import Any, Optional
 
 import httpx
+import orjson
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
+from open_meteo import MARINE_CURRENT, OPENMETEO, WIND_CURRENT, WIND_HOURLY, current_values
+
 # Initialize MCP server
 app = Server("surf-reporter")
 
 # Store for conversation context
 context_store = {}
 
+# Marine series reported by get_weather_forecast
+MARINE_HOURLY = ("wave_height", "swell_wave_height")
+MARINE_DAILY = ("wave_height_max", "wave_direction_dominant", "wave_period_max")
+
+# Shared HTTP client so geocoding connections (TLS) are reused across tool calls
+HTTP = httpx.AsyncClient(
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+)
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -109,62 +121,71 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
 async def get_weather_forecast(lat: float, lon: float) -> list[TextContent]:
     """Get marine weather forecast using Open-Meteo Marine API (free)."""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Open-Meteo Marine API - completely free, no API key needed
-            url = "https://marine-api.open-meteo.com/v1/marine"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "hourly": "wave_height,wave_direction,wave_period,wind_wave_height,swell_wave_height,swell_wave_direction,swell_wave_period",
-                "daily": "wave_height_max,wave_direction_dominant,wave_period_max",
-                "current": "wave_height,wave_direction,wave_period",
-                "timezone": "auto"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            marine_data = response.json()
-            
-            # Also get wind data from regular Open-Meteo API
-            url2 = "https://api.open-meteo.com/v1/forecast"
-            params2 = {
-                "latitude": lat,
-                "longitude": lon,
-                "hourly": "wind_speed_10m,wind_direction_10m",
-                "current": "wind_speed_10m,wind_direction_10m",
-                "timezone": "auto"
-            }
-            
-            response2 = await client.get(url2, params=params2)
-            response2.raise_for_status()
-            wind_data = response2.json()
-            
-            # Format the response
-            result = {
-                "location": {"latitude": lat, "longitude": lon},
-                "timestamp": datetime.now().isoformat(),
-                "current_conditions": {
-                    "wave_height_m": marine_data.get("current", {}).get("wave_height"),
-                    "wave_direction": marine_data.get("current", {}).get("wave_direction"),
-                    "wave_period_s": marine_data.get("current", {}).get("wave_period"),
-                    "wind_speed_kmh": wind_data.get("current", {}).get("wind_speed_10m"),
-                    "wind_direction": wind_data.get("current", {}).get("wind_direction_10m")
-                },
-                "hourly_forecast": {
-                    "times": marine_data.get("hourly", {}).get("time", [])[:24],
-                    "wave_heights": marine_data.get("hourly", {}).get("wave_height", [])[:24],
-                    "swell_heights": marine_data.get("hourly", {}).get("swell_wave_height", [])[:24],
-                    "wind_speeds": wind_data.get("hourly", {}).get("wind_speed_10m", [])[:24],
-                    "wind_directions": wind_data.get("hourly", {}).get("wind_direction_10m", [])[:24]
-                },
-                "daily_summary": marine_data.get("daily", {})
+        # Open-Meteo Marine API - completely free, no API key needed
+        url = "https://marine-api.open-meteo.com/v1/marine"
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": MARINE_HOURLY,
+            "daily": MARINE_DAILY,
+            "current": MARINE_CURRENT,
+            "timezone": "auto"
+        }
+        
+        # Also get wind data from regular Open-Meteo API
+        url2 = "https://api.open-meteo.com/v1/forecast"
+        params2 = {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": WIND_HOURLY,
+            "current": WIND_CURRENT,
+            "forecast_days": 1,
+            "timezone": "auto"
+        }
+        
+        # Fetch marine and wind data concurrently (the client is synchronous)
+        responses, responses2 = await asyncio.gather(
+            asyncio.to_thread(OPENMETEO.weather_api, url, params=params),
+            asyncio.to_thread(OPENMETEO.weather_api, url2, params=params2)
+        )
+        marine, wind = responses[0], responses2[0]
+        
+        marine_current = current_values(marine, MARINE_CURRENT)
+        wind_current = current_values(wind, WIND_CURRENT)
+        hourly_marine = marine.Hourly()
+        hourly_wind = wind.Hourly()
+        daily = marine.Daily()
+        utc_offset = marine.UtcOffsetSeconds()
+        
+        # Format the response
+        result = {
+            "location": {"latitude": lat, "longitude": lon},
+            "timestamp": datetime.now().isoformat(),
+            "current_conditions": {
+                "wave_height_m": marine_current["wave_height"],
+                "wave_direction": marine_current["wave_direction"],
+                "wave_period_s": marine_current["wave_period"],
+                "wind_speed_kmh": wind_current["wind_speed_10m"],
+                "wind_direction": wind_current["wind_direction_10m"]
+            },
+            "hourly_forecast": {
+                "times": format_times(hourly_marine, utc_offset, "%Y-%m-%dT%H:%M", limit=24),
+                "wave_heights": hourly_marine.Variables(0).ValuesAsNumpy()[:24],
+                "swell_heights": hourly_marine.Variables(1).ValuesAsNumpy()[:24],
+                "wind_speeds": hourly_wind.Variables(0).ValuesAsNumpy()[:24],
+                "wind_directions": hourly_wind.Variables(1).ValuesAsNumpy()[:24]
+            },
+            "daily_summary": {
+                "time": format_times(daily, utc_offset, "%Y-%m-%d"),
+                **{name: daily.Variables(i).ValuesAsNumpy() for i, name in enumerate(MARINE_DAILY)}
             }
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-            
+        }
+        
+        return [TextContent(
+            type="text",
+            text=orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+        )]
+
     except Exception as e:
         return [TextContent(
             type="text",
@@ -172,6 +193,14 @@ async def get_weather_forecast(lat: float, lon: float) -> list[TextContent]:
         )]
 
 
+def format_times(block, utc_offset: int, fmt: str, limit: Optional[int] = None) -> list[str]:
+    """Rebuild the JSON API's local timestamps from a FlatBuffers time range."""
+    return [
+        datetime.fromtimestamp(t + utc_offset, timezone.utc).strftime(fmt)
+        for t in range(block.Time(), block.TimeEnd(), block.Interval())[:limit]
+    ]
+
+
 async def search_surf_spot_info(spot_name: str, location: str) -> list[TextContent]:
     """Search for surf spot information."""
     query = f"{spot_name} surf spot {location} best conditions optimal swell wind direction"
@@ -186,43 +215,42 @@ async def get_spot_coordinates(spot_name: str, location: str) -> list[TextConten
     """Get coordinates for a surf spot using geocoding."""
     try:
         # Using Open-Meteo Geocoding API (free)
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            url = "https://geocoding-api.open-meteo.com/v1/search"
-            params = {
-                "name": f"{spot_name} {location}",
-                "count": 5,
-                "language": "en",
-                "format": "json"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        url = "https://geocoding-api.open-meteo.com/v1/search"
+        params = {
+            "name": f"{spot_name} {location}",
+            "count": 5,
+            "language": "en",
+            "format": "json"
+        }
+        
+        response = await HTTP.get(url, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        if data.get("results"):
+            results = []
+            for result in data["results"][:3]:
+                results.append({
+                    "name": result.get("name"),
+                    "latitude": result.get("latitude"),
+                    "longitude": result.get("longitude"),
+                    "country": result.get("country"),
+                    "admin1": result.get("admin1")
+                })
             
-            if data.get("results"):
-                results = []
-                for result in data["results"][:3]:
-                    results.append({
-                        "name": result.get("name"),
-                        "latitude": result.get("latitude"),
-                        "longitude": result.get("longitude"),
-                        "country": result.get("country"),
-                        "admin1": result.get("admin1")
-                    })
-                
-                return [TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "query": f"{spot_name} {location}",
-                        "results": results
-                    }, indent=2)
-                )]
-            else:
-                return [TextContent(
-                    type="text",
-                    text=f"No coordinates found for {spot_name} {location}"
-                )]
-                
+            return [TextContent(
+                type="text",
+                text=orjson.dumps({
+                    "query": f"{spot_name} {location}",
+                    "results": results
+                }, option=orjson.OPT_INDENT_2).decode()
+            )]
+        else:
+            return [TextContent(
+                type="text",
+                text=f"No coordinates found for {spot_name} {location}"
+            )]
+
     except Exception as e:
         return [TextContent(
             type="text",
@@ -234,12 +262,15 @@ async def main():
     """Run the MCP server."""
     from mcp.server.stdio import stdio_server
     
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    finally:
+        await HTTP.aclose()
 
 
 if __name__ == "__main__":
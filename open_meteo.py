@@ -0,0 +1,37 @@
+"""
+Shared Open-Meteo access for the surf reporter
+Used by the Gradio frontend, the MCP server and the LangChain agent
+"""
+
+import math
+
+import openmeteo_requests
+
+# One client per process: its session pools connections, and responses arrive as
+# FlatBuffers decoded straight to NumPy arrays rather than JSON
+OPENMETEO = openmeteo_requests.Client()
+
+# Variables per endpoint, in request order. FlatBuffers responses index variables by
+# position, so each tuple is both the request parameter and the decoding order.
+MARINE_CURRENT = ("wave_height", "wave_direction", "wave_period")
+WIND_CURRENT = ("wind_speed_10m", "wind_direction_10m")
+WIND_HOURLY = ("wind_speed_10m", "wind_direction_10m")
+
+
+def current_values(response, names: tuple) -> dict:
+    """Read current values from a FlatBuffers response, keyed by variable name.
+
+    Values arrive as float32, so they are rounded back to the JSON API's precision:
+    whole degrees for directions, two decimals otherwise. Missing values become None.
+    """
+    current = response.Current()
+    values = {}
+    for i, name in enumerate(names):
+        value = current.Variables(i).Value()
+        if math.isnan(value):
+            values[name] = None
+        elif "direction" in name:
+            values[name] = round(value)
+        else:
+            values[name] = round(value, 2)
+    return values
@@ -4,9 +4,10 @@ from langchain_tavily import TavilySearch
 from langchain.agents import create_agent
 from langchain.tools import tool
 from geopy.geocoders import Nominatim
-import openmeteo_requests
 import pandas as pd
 
+from open_meteo import OPENMETEO
+
 
 @tool
 def geocode_address(address: str) -> tuple[float, float]:
@@ -34,50 +35,6 @@ def get_swell(coords: tuple) -> dict:
     returns: 
         dict with hourly weather data
     """
-    openmeteo = openmeteo_requests.Client()
-    # Define the API URL for marine weather
-    url = "https://marine-api.open-meteo.com/v1/marine"
-
-    latitude = coords[0]
-    longitude = coords[1]
-
-    # Specify the parameters for the request
-    params = {
-        "latitude": latitude,  # Example: Latitude for a coastal area
-        "longitude": longitude, # Example: Longitude for a coastal area
-        "hourly": ["wave_height", "wave_direction", "wave_period"], # Requesting specific marine variables
-        "timezone": "Australia/Melbourne" # Specify the desired timezone
-    }
-
-    # Make the API request
-    responses = openmeteo.weather_api(url, params=params)
-    # Process the response
-    if responses:
-        response = responses[0] # Assuming only one location is requested
-
-        # Extract hourly data
-        hourly = response.Hourly()
-        hourly_data = {
-            "time": pd.to_datetime(hourly.Time(), unit="s"),
-            "wave_height": hourly.Variables(0).ValuesAsNumpy(),
-            "wave_direction": hourly.Variables(1).ValuesAsNumpy(),
-            "wave_period": hourly.Variables(2).ValuesAsNumpy()
-        }
-
-        return hourly_data
-    else:
-        print("No data received from the API.")
-
-@tool
-def get_swell(coords: tuple) -> dict:
-    """
-    Get the get_swell forecast for the given latitude and longitude.
-    args: 
-        coords: tuple containing (latitude, longitude)
-    returns: 
-        dict with hourly weather data
-    """
-    openmeteo = openmeteo_requests.Client()
     # Define the API URL for marine weather
     url = "https://marine-api.open-meteo.com/v1/marine"
 
@@ -93,7 +50,7 @@ def get_swell(coords: tuple) -> dict:
     }
 
     # Make the API request
-    responses = openmeteo.weather_api(url, params=params)
+    responses = OPENMETEO.weather_api(url, params=params)
     # Process the response
     if responses:
         response = responses[0] # Assuming only one location is requested
@@ -120,8 +77,6 @@ def get_wind(coords: tuple) -> dict:
     returns: 
         dict with hourly wind data
     """
-    openmeteo = openmeteo_requests.Client()
-
     latitude = coords[0]
     longitude = coords[1]
 
@@ -134,7 +89,7 @@ def get_wind(coords: tuple) -> dict:
     }
 
     # Make the API request
-    responses = openmeteo.weather_api(params=params)
+    responses = OPENMETEO.weather_api(params=params)
     # Process the response
     if responses:
         response = responses[0] # Assuming only one location is requested